@@ -0,0 +1,483 @@
+import os
+
+import pandas as pd
+
+from shared_cache import dataset_version, freeze, shared_cache
+
+# 各页面的数据读取与统计逻辑，不依赖 streamlit，
+# 页面脚本和压测脚本（load_test.py）都调用这里的函数。
+# 过滤后的数据按（数据集版本, 筛选条件）缓存一份，各维度的统计表按
+# （数据集版本, 筛选条件, 维度）缓存，均在进程内供所有会话共享；
+# 返回的 DataFrame 为共享对象，调用方不要原地修改。
+# 一次统计只取一次数据集版本，读取、过滤和统计表的缓存键使用同一个版本，
+# 避免文件在中途被替换时把旧数据的结果缓存到新版本下。
+
+
+def _read_excel(path):
+    # 读取数据
+    df = pd.read_excel(path)
+
+    # 清理列名，去除可能的空格
+    df.columns = df.columns.str.strip()
+
+    # 处理缺失值：将空字符串替换为 NaN
+    df.replace('', pd.NA, inplace=True)
+    return df
+
+
+# 名单中附带的学号列（不同导出文件列名不同）
+ID_COLUMNS = ['学号', '学号/工号']
+
+
+def _roster(df_filtered, selected_dimension, mask, unique=False):
+    # 按掩码筛出名单（维度, 姓名, 学号），一次向量化完成，不再逐个维度值过滤
+    columns = [selected_dimension, '姓名'] + [c for c in ID_COLUMNS if c in df_filtered.columns and c != selected_dimension]
+    roster = df_filtered.loc[mask, columns]
+    roster = roster[roster[selected_dimension].notna()]
+    if unique:
+        # 去重并按姓名排序
+        roster = roster.drop_duplicates(subset=[selected_dimension, '姓名']).sort_values([selected_dimension, '姓名'])
+    return roster
+
+
+def roster_names(roster, selected_dimension):
+    # 按维度把名单合并为“姓名, 姓名”字符串，供页面表格显示
+    names = roster.dropna(subset=['姓名'])
+    return names.groupby(selected_dimension, sort=False)['姓名'].agg(', '.join).to_dict()
+
+
+def _isin(column, selected):
+    # 筛选条件统一在这里处理：筛选项来自数据清单时缺失值为 None、日期为字符串。
+    # 选中 None/NaN 时匹配该列的缺失值（isin 在 object 列上不会把 None 与 NaN 视为相同），
+    # 日期列把选中的字符串转换为日期后再比较
+    selected = list(selected)
+    values = [v for v in selected if not pd.isna(v)]
+    if pd.api.types.is_datetime64_any_dtype(column):
+        values = [pd.Timestamp(v) for v in values]
+    mask = column.isin(values)
+    if len(values) < len(selected):
+        mask |= column.isna()
+    return mask
+
+
+# ---------------------------------------------------------------- 出勤
+
+def load_attendance(path, cache=shared_cache, version=None):
+    def compute():
+        df = _read_excel(path)
+
+        # 用默认日期填充空值（2000年1月1日），可以防止 NaT 错误
+        df['时间'] = df['时间'].fillna(pd.to_datetime('2000-01-01'))
+
+        # 将签到状态“已签”和“教师代签”视为出勤，其他为缺勤
+        df['出勤状态'] = df['签到状态'].apply(lambda x: '出勤' if x in ['已签', '教师代签'] else '缺勤')
+
+        # 只考虑不是2000-01-01的时间
+        return df[df['时间'] != pd.to_datetime('2000-01-01')]
+
+    return cache.get_or_compute(('attendance', version or dataset_version(path)), compute)
+
+
+def attendance_filtered(path, selected_dates, selected_courses, cache=shared_cache, version=None):
+    version = version or dataset_version(path)
+
+    def compute():
+        df_filtered = load_attendance(path, cache, version)
+
+        # 过滤选择的日期数据
+        df_filtered = df_filtered[_isin(df_filtered['时间'], selected_dates)]
+
+        # 如果用户选择了课程，则过滤课程
+        if selected_courses:
+            df_filtered = df_filtered[_isin(df_filtered['课程'], selected_courses)]
+        return df_filtered
+
+    key = ('attendance_filtered', version, freeze(selected_dates), freeze(selected_courses))
+    return cache.get_or_compute(key, compute)
+
+
+def attendance_aggregate(df_filtered, selected_dimension):
+    # 按选定维度进行合并统计：计算总人次、出勤人次和缺勤人次
+    attendance_by_dimension = df_filtered.groupby([selected_dimension]).agg(
+        总人次=('姓名', 'size'),
+        出勤人次=('出勤状态', lambda x: (x == '出勤').sum()),
+        缺勤人次=('出勤状态', lambda x: (x == '缺勤').sum())
+    ).reset_index()
+
+    # 计算出勤率
+    attendance_by_dimension['出勤率'] = (attendance_by_dimension['出勤人次'] / attendance_by_dimension['总人次']) * 100
+
+    # 处理计算结果中的NaN值
+    attendance_by_dimension['出勤率'] = attendance_by_dimension['出勤率'].fillna(0).round(2)
+
+    # 计算排序：100%出勤率排在最前面
+    attendance_by_dimension['排序出勤率'] = attendance_by_dimension['出勤率'].apply(lambda x: -1 if x == 100 else x)
+
+    # 对数据按出勤率降序排列
+    attendance_by_dimension_sorted = attendance_by_dimension.sort_values(by=['排序出勤率', '出勤率'], ascending=[True, False])
+    return attendance_by_dimension_sorted
+
+
+def attendance_stats(path, selected_dates, selected_courses, selected_dimension, cache=shared_cache):
+    version = dataset_version(path)
+    df_filtered = attendance_filtered(path, selected_dates, selected_courses, cache, version)
+    key = ('attendance_stats', version, freeze(selected_dates), freeze(selected_courses), selected_dimension)
+    return df_filtered, cache.get_or_compute(key, lambda: attendance_aggregate(df_filtered, selected_dimension))
+
+
+def attendance_roster(df_filtered, selected_dimension):
+    # 缺勤学生名单
+    return _roster(df_filtered, selected_dimension, df_filtered['出勤状态'] == '缺勤')
+
+
+# ---------------------------------------------------------------- 作业
+
+def load_task(path, cache=shared_cache, version=None):
+    def compute():
+        df = _read_excel(path)
+
+        # 如果成绩为空，视为缺考
+        df['成绩'] = df['成绩'].fillna('缺考')
+        return df
+
+    return cache.get_or_compute(('task', version or dataset_version(path)), compute)
+
+
+def task_filtered(path, selected_dates, selected_courses, cache=shared_cache, version=None):
+    version = version or dataset_version(path)
+
+    def compute():
+        df = load_task(path, cache, version)
+
+        # 过滤选择的作业数据
+        df_filtered = df[_isin(df['作业'], selected_dates)]
+
+        # 如果用户选择了课程，则过滤课程
+        if selected_courses:
+            df_filtered = df_filtered[_isin(df_filtered['课程'], selected_courses)]
+        return df_filtered
+
+    key = ('task_filtered', version, freeze(selected_dates), freeze(selected_courses))
+    return cache.get_or_compute(key, compute)
+
+
+def task_aggregate(df_filtered, selected_dimension):
+    # 按选定维度分组，计算各项统计数据
+    stats_by_dimension = df_filtered.groupby([selected_dimension]).agg(
+        总人次=('姓名', 'size'),
+        平均成绩=('成绩', lambda x: pd.to_numeric(x[x != '缺考'], errors='coerce').mean()),  # 排除缺考
+        及格人次=('成绩', lambda x: (pd.to_numeric(x[x != '缺考'], errors='coerce') >= 60).sum()),
+        实考人次=('成绩', lambda x: (x != '缺考').sum()),
+        缺考人次=('成绩', lambda x: (x == '缺考').sum()),
+        最高分=('成绩', lambda x: pd.to_numeric(x[x != '缺考'], errors='coerce').max()),
+        最低分=('成绩', lambda x: pd.to_numeric(x[x != '缺考'], errors='coerce').min()),
+        分数段0_59=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') < 60).sum())),
+        分数段60_69=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') >= 60) & (pd.to_numeric(x[x != '缺考'], errors='coerce') < 70)).sum()),
+        分数段70_79=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') >= 70) & (pd.to_numeric(x[x != '缺考'], errors='coerce') < 80)).sum()),
+        分数段80_89=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') >= 80) & (pd.to_numeric(x[x != '缺考'], errors='coerce') < 90)).sum()),
+        分数段90_99=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') >= 90) & (pd.to_numeric(x[x != '缺考'], errors='coerce') < 100)).sum()),
+        分数段100=('成绩', lambda x: (pd.to_numeric(x[x != '缺考'], errors='coerce') == 100).sum())
+    ).reset_index()
+
+    # 处理NaN值
+    stats_by_dimension.fillna(0, inplace=True)
+
+    # 计算缺考名单
+    absent_names = roster_names(task_roster(df_filtered, selected_dimension), selected_dimension)
+    stats_by_dimension['缺考名单'] = stats_by_dimension[selected_dimension].map(absent_names).fillna('')
+
+    # 计算及格率
+    stats_by_dimension['及格率'] = (stats_by_dimension['及格人次'] / stats_by_dimension['实考人次'] * 100).fillna(0).round(2)
+    return stats_by_dimension
+
+
+def task_stats(path, selected_dates, selected_courses, selected_dimension, cache=shared_cache):
+    version = dataset_version(path)
+    df_filtered = task_filtered(path, selected_dates, selected_courses, cache, version)
+    key = ('task_stats', version, freeze(selected_dates), freeze(selected_courses), selected_dimension)
+    return df_filtered, cache.get_or_compute(key, lambda: task_aggregate(df_filtered, selected_dimension))
+
+
+def task_roster(df_filtered, selected_dimension):
+    # 缺考名单
+    return _roster(df_filtered, selected_dimension, df_filtered['成绩'] == '缺考')
+
+
+# ---------------------------------------------------------------- 知识点
+
+def load_knowledge_points(path, cache=shared_cache, version=None):
+    def compute():
+        df = _read_excel(path)
+
+        # 核对答案为“正确”视为答对，其他为答错
+        df['答题情况'] = df['核对答案'].apply(lambda x: '正确' if x in ['正确'] else '错误')
+        return df
+
+    return cache.get_or_compute(('knowledge_points', version or dataset_version(path)), compute)
+
+
+def knowledge_point_filtered(path, selected_dates, selected_courses, selected_sources, cache=shared_cache, version=None):
+    version = version or dataset_version(path)
+
+    def compute():
+        df = load_knowledge_points(path, cache, version)
+
+        # 过滤选择的知识点数据
+        df_filtered = df[_isin(df['知识点'], selected_dates)]
+
+        # 如果用户选择了课程，则过滤课程
+        if selected_courses:
+            df_filtered = df_filtered[_isin(df_filtered['课程'], selected_courses)]
+
+        # 如果用户选择了来源，则过滤来源
+        if selected_sources:
+            df_filtered = df_filtered[_isin(df_filtered['来源'], selected_sources)]
+        return df_filtered
+
+    key = ('knowledge_point_filtered', version, freeze(selected_dates), freeze(selected_courses),
+           freeze(selected_sources))
+    return cache.get_or_compute(key, compute)
+
+
+def knowledge_point_aggregate(df_filtered, selected_dimension):
+    # 按选定维度进行合并统计：计算总人次、答对人次和答错人次
+    attendance_by_dimension = df_filtered.groupby([selected_dimension]).agg(
+        总人次=('姓名', 'size'),
+        答对人次=('答题情况', lambda x: (x == '正确').sum()),
+        答错人次=('答题情况', lambda x: (x == '错误').sum())
+    ).reset_index()
+
+    # 确保'正确率'列是数值型
+    attendance_by_dimension['正确率'] = (attendance_by_dimension['答对人次'] / attendance_by_dimension['总人次']) * 100
+    attendance_by_dimension['正确率'] = pd.to_numeric(attendance_by_dimension['正确率'], errors='coerce')
+
+    # 处理NaN和无效值，将它们设为0或者其他默认值
+    attendance_by_dimension['正确率'] = attendance_by_dimension['正确率'].fillna(0)
+    return attendance_by_dimension
+
+
+def knowledge_point_stats(path, selected_dates, selected_courses, selected_sources, selected_dimension, cache=shared_cache):
+    version = dataset_version(path)
+    df_filtered = knowledge_point_filtered(path, selected_dates, selected_courses, selected_sources, cache, version)
+    key = ('knowledge_point_stats', version, freeze(selected_dates), freeze(selected_courses),
+           freeze(selected_sources), selected_dimension)
+    return df_filtered, cache.get_or_compute(key, lambda: knowledge_point_aggregate(df_filtered, selected_dimension))
+
+
+def knowledge_point_roster(df_filtered, selected_dimension):
+    # 答错学生名单（去重）
+    return _roster(df_filtered, selected_dimension, df_filtered['答题情况'] == '错误', unique=True)
+
+
+# ---------------------------------------------------------------- 任务点
+
+def load_check_points(path, cache=shared_cache, version=None):
+    def compute():
+        df = _read_excel(path)
+
+        # 详情为“已完成”视为已完成，其他为未完成
+        df['完成情况'] = df['详情'].apply(lambda x: '已完成' if x in ['已完成'] else '未完成')
+        return df
+
+    return cache.get_or_compute(('check_points', version or dataset_version(path)), compute)
+
+
+def check_point_filtered(path, selected_dates, selected_courses, cache=shared_cache, version=None):
+    version = version or dataset_version(path)
+
+    def compute():
+        df = load_check_points(path, cache, version)
+
+        # 过滤选择的任务点数据
+        df_filtered = df[_isin(df['任务点'], selected_dates)]
+
+        # 如果用户选择了课程，则过滤课程
+        if selected_courses:
+            df_filtered = df_filtered[_isin(df_filtered['课程'], selected_courses)]
+        return df_filtered
+
+    key = ('check_point_filtered', version, freeze(selected_dates), freeze(selected_courses))
+    return cache.get_or_compute(key, compute)
+
+
+def check_point_aggregate(df_filtered, selected_dimension):
+    # 按选定维度进行合并统计：计算总人次、已完成人次和未完成人次
+    attendance_by_dimension = df_filtered.groupby([selected_dimension]).agg(
+        总人次=('姓名', 'size'),
+        已完成人次=('完成情况', lambda x: (x == '已完成').sum()),
+        未完成人次=('完成情况', lambda x: (x == '未完成').sum())
+    ).reset_index()
+
+    # 计算完成率，去掉百分号，只显示数字
+    attendance_by_dimension['完成率'] = (attendance_by_dimension['已完成人次'] / attendance_by_dimension['总人次']) * 100
+
+    # 确保完成率是数值格式，并且去除无效值
+    attendance_by_dimension['完成率'] = pd.to_numeric(attendance_by_dimension['完成率'], errors='coerce')
+
+    # 处理NaN和无效值，将它们设为0或者其他默认值
+    attendance_by_dimension['完成率'] = attendance_by_dimension['完成率'].fillna(0)
+    return attendance_by_dimension
+
+
+def check_point_stats(path, selected_dates, selected_courses, selected_dimension, cache=shared_cache):
+    version = dataset_version(path)
+    df_filtered = check_point_filtered(path, selected_dates, selected_courses, cache, version)
+    key = ('check_point_stats', version, freeze(selected_dates), freeze(selected_courses), selected_dimension)
+    return df_filtered, cache.get_or_compute(key, lambda: check_point_aggregate(df_filtered, selected_dimension))
+
+
+def check_point_roster(df_filtered, selected_dimension):
+    # 未完成学生名单
+    return _roster(df_filtered, selected_dimension, df_filtered['完成情况'] == '未完成')
+
+
+# ---------------------------------------------------------------- 音视频
+
+def load_audio_and_video(path, cache=shared_cache, version=None):
+    return cache.get_or_compute(('audio_and_video', version or dataset_version(path)), lambda: _read_excel(path))
+
+
+def audio_and_video_filtered(path, selected_dates, selected_courses, cache=shared_cache, version=None):
+    version = version or dataset_version(path)
+
+    def compute():
+        df = load_audio_and_video(path, cache, version)
+
+        # 过滤选择的视频数据
+        df_filtered = df[_isin(df['视频'], selected_dates)]
+
+        # 如果用户选择了课程，则过滤课程
+        if selected_courses:
+            df_filtered = df_filtered[_isin(df_filtered['课程'], selected_courses)]
+        return df_filtered
+
+    key = ('audio_and_video_filtered', version, freeze(selected_dates), freeze(selected_courses))
+    return cache.get_or_compute(key, compute)
+
+
+def audio_and_video_aggregate(df_filtered, selected_dimension):
+    # 按选定维度进行合并统计：计算观看时长的总和、平均值、最大值和最小值
+    watch_time_stats_by_dimension = df_filtered.groupby([selected_dimension]).agg(
+        总人次=('姓名', 'size'),
+        总观看时长=('观看时长', 'sum'),
+        最高观看时长=('观看时长', 'max'),
+        最低观看时长=('观看时长', 'min'),
+        已观看人次=('观看时长', lambda x: (x > 0).sum()),
+        未观看人次=('观看时长', lambda x: (x == 0).sum() or (x.isna()).sum())
+    ).reset_index()
+
+    # 确保观看时长是数值格式，并且去除无效值
+    watch_time_stats_by_dimension['平均观看时长'] = pd.to_numeric(watch_time_stats_by_dimension['总观看时长'], errors='coerce') / watch_time_stats_by_dimension['总人次']
+    watch_time_stats_by_dimension['最高观看时长'] = pd.to_numeric(watch_time_stats_by_dimension['最高观看时长'], errors='coerce')
+    watch_time_stats_by_dimension['最低观看时长'] = pd.to_numeric(watch_time_stats_by_dimension['最低观看时长'], errors='coerce')
+
+    # 处理NaN和无效值，将它们设为0或者其他默认值
+    watch_time_stats_by_dimension['平均观看时长'] = watch_time_stats_by_dimension['平均观看时长'].fillna(0)
+    watch_time_stats_by_dimension['最高观看时长'] = watch_time_stats_by_dimension['最高观看时长'].fillna(0)
+    watch_time_stats_by_dimension['最低观看时长'] = watch_time_stats_by_dimension['最低观看时长'].fillna(0)
+    return watch_time_stats_by_dimension
+
+
+def audio_and_video_stats(path, selected_dates, selected_courses, selected_dimension, cache=shared_cache):
+    version = dataset_version(path)
+    df_filtered = audio_and_video_filtered(path, selected_dates, selected_courses, cache, version)
+    key = ('audio_and_video_stats', version, freeze(selected_dates), freeze(selected_courses), selected_dimension)
+    return df_filtered, cache.get_or_compute(key, lambda: audio_and_video_aggregate(df_filtered, selected_dimension))
+
+
+def audio_and_video_roster(df_filtered, selected_dimension):
+    # 未观看名单
+    mask = df_filtered['观看时长'].isna() | (df_filtered['观看时长'] == 0)
+    return _roster(df_filtered, selected_dimension, mask)
+
+
+# ---------------------------------------------------------------- 页面登记
+
+def _xlsx_files(folder, prefix=''):
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, f) for f in os.listdir(folder) if f.startswith(prefix) and f.endswith('.xlsx')]
+
+
+def _first_xlsx(folder, prefix=''):
+    # 与页面一致：按目录顺序的第一个文件
+    files = _xlsx_files(folder, prefix)
+    return files[0] if files else None
+
+
+def _newest_xlsx(folder):
+    # 与知识点页面一致：修改时间最新的文件
+    files = _xlsx_files(folder)
+    return max(files, key=os.path.getmtime) if files else None
+
+
+# 页面名 -> 页面脚本、数据清单（文件夹, 文件名前缀）、默认数据文件、读取/过滤/统计/名单函数、
+# 筛选列（与页面中多选框的顺序一致）、名单标题
+PAGES = {
+    'attendance': {
+        'script': 'attendance.py',
+        'manifest': ('.', '出勤.xlsx'),
+        'data_file': lambda: '出勤.xlsx',
+        'load': load_attendance,
+        'filtered': attendance_filtered,
+        'aggregate': attendance_aggregate,
+        'stats': attendance_stats,
+        'roster': attendance_roster,
+        'filters': ['时间', '课程'],
+        'roster_title': '缺勤学生',
+    },
+    'task': {
+        'script': 'task.py',
+        'manifest': ('作业统计', ''),
+        'data_file': lambda: _first_xlsx('作业统计'),
+        'load': load_task,
+        'filtered': task_filtered,
+        'aggregate': task_aggregate,
+        'stats': task_stats,
+        'roster': task_roster,
+        'filters': ['作业', '课程'],
+        'roster_title': '缺考名单',
+    },
+    'knowledge_points': {
+        'script': 'anwers-language-points.py',
+        'manifest': ('知识点', ''),
+        'data_file': lambda: _newest_xlsx('知识点'),
+        'load': load_knowledge_points,
+        'filtered': knowledge_point_filtered,
+        'aggregate': knowledge_point_aggregate,
+        'stats': knowledge_point_stats,
+        'roster': knowledge_point_roster,
+        'filters': ['知识点', '课程', '来源'],
+        'roster_title': '答错学生',
+    },
+    'check_points': {
+        'script': 'check_points.py',
+        'manifest': ('.', '任务点完成详情'),
+        'data_file': lambda: _first_xlsx('.', '任务点完成详情'),
+        'load': load_check_points,
+        'filtered': check_point_filtered,
+        'aggregate': check_point_aggregate,
+        'stats': check_point_stats,
+        'roster': check_point_roster,
+        'filters': ['任务点', '课程'],
+        'roster_title': '未完成学生',
+    },
+    'audio_and_video': {
+        'script': 'audio_and_video.py',
+        'manifest': ('.', '音视频观看详情.xlsx'),
+        'data_file': lambda: '音视频观看详情.xlsx',
+        'load': load_audio_and_video,
+        'filtered': audio_and_video_filtered,
+        'aggregate': audio_and_video_aggregate,
+        'stats': audio_and_video_stats,
+        'roster': audio_and_video_roster,
+        'filters': ['视频', '课程'],
+        'roster_title': '未观看名单',
+    },
+}
+
+
+def default_filters(page, path, cache=shared_cache):
+    # 页面打开时的默认筛选条件：每个多选框默认全选
+    df = PAGES[page]['load'](path, cache)
+    return [list(df[c].unique()) if c in df.columns else [] for c in PAGES[page]['filters']]
@@ -1,8 +1,9 @@
-import pandas as pd
-import streamlit as st
-import altair as alt
 import os
 
+import streamlit as st
+
+from manifest import describe_file, load_manifest, newest_first
+
 # 设置页面标题
 st.title("知识点掌握度分析")
 
@@ -11,15 +12,15 @@ knowledge_point_folder = os.path.join(os.getcwd(), "知识点")
 
 # 检查是否存在“知识点”子文件夹
 if os.path.exists(knowledge_point_folder):
-    # 获取所有的xlsx文件
-    xlsx_files = [f for f in os.listdir(knowledge_point_folder) if f.endswith('.xlsx')]
+    # 从数据清单获取所有的xlsx文件
+    files = load_manifest(knowledge_point_folder)
     
     # 如果没有xlsx文件
-    if not xlsx_files:
+    if not files:
         st.error("在‘知识点’文件夹中没有找到任何xlsx文件。")
     else:
-        # 排序文件按修改时间，选择最新的文件作为默认值
-        xlsx_files.sort(key=lambda x: os.path.getmtime(os.path.join(knowledge_point_folder, x)), reverse=True)
+        # 排序文件按修改时间（清单中已记录），选择最新的文件作为默认值
+        xlsx_files = newest_first(files)
         
         # 用户选择文件，默认选择第一个文件
         selected_files = st.multiselect("选择要分析的文件", xlsx_files, default=xlsx_files[:1])
@@ -29,35 +30,23 @@ if os.path.exists(knowledge_point_folder):
         if not selected_files:
             st.error("请至少选择一个文件进行分析。")
         else:
-            # 创建一个空的DataFrame来存储合并后的数据
-            df_combined = pd.DataFrame()
-
             # 遍历选中的文件，逐个读取并合并数据
             for selected_file in selected_files:
                 selected_file_path = os.path.join(knowledge_point_folder, selected_file)
         
         # 检查文件是否存在
         if os.path.exists(selected_file_path):
-            # 读取数据
-            df = pd.read_excel(selected_file_path)
-
-            # 清理列名，去除可能的空格
-            df.columns = df.columns.str.strip()
-
-            # 处理缺失值：将空字符串替换为 NaN
-            df.replace('', pd.NA, inplace=True)
-
-            # 将签到状态“已签”和“教师代签”视为出勤，其他为缺勤
-            df['答题情况'] = df['核对答案'].apply(lambda x: '正确' if x in ['正确'] else '错误')
+            # 筛选项来自数据清单，只在清单中没有记录时读取所选文件
+            values = describe_file(knowledge_point_folder, os.path.basename(selected_file_path), 'knowledge_points')['values']
 
             # 获取所有可用的知识点
-            available_dates = df['知识点'].unique()
+            available_dates = values['知识点']
 
             # 获取所有可用的课程
-            available_courses = df['课程'].unique()
+            available_courses = values['课程']
 
             # 获取所有可用的来源
-            available_sources = df['来源'].unique() if '来源' in df.columns else []
+            available_sources = values.get('来源', [])
 
             # 用户选择的知识点、课程和来源
             selected_dates = st.multiselect("选择查看的知识点", available_dates, default=available_dates)
@@ -68,17 +57,6 @@ if os.path.exists(knowledge_point_folder):
             show_absent_students = st.checkbox("显示答错学生", value=False)
 
             if selected_dates:
-                # 过滤选择的知识点数据
-                df_filtered = df[df['知识点'].isin(selected_dates)]
-
-                # 如果用户选择了课程，则过滤课程
-                if selected_courses:
-                    df_filtered = df_filtered[df_filtered['课程'].isin(selected_courses)]
-
-                # 如果用户选择了来源，则过滤来源
-                if selected_sources:
-                    df_filtered = df_filtered[df_filtered['来源'].isin(selected_sources)]
-
                 # 获取所有可用的维度（列名），如果没有选择课程，就去除“课程”维度
                 available_dimensions = [
                     '学校', '院系', '专业', '行政班级', '授课班级', '教师'
@@ -91,22 +69,17 @@ if os.path.exists(knowledge_point_folder):
                 selected_dimension = st.selectbox("选择分析的维度", available_dimensions, index=1)  # 默认选择“院系”
 
                 if selected_dimension:
-                    # 动态分组，按用户选择的维度进行分组
-                    groupby_columns = [selected_dimension]
+                    # 需要统计时才导入 pandas、altair 和统计模块，筛选框无需等待它们加载
+                    import altair as alt
+                    import pandas as pd
 
-                    # 按选定维度进行合并统计：计算总人次、出勤人次和缺勤人次
-                    attendance_by_dimension = df_filtered.groupby(groupby_columns).agg(
-                        总人次=('姓名', 'size'),
-                        答对人次=('答题情况', lambda x: (x == '正确').sum()),
-                        答错人次=('答题情况', lambda x: (x == '错误').sum())
-                    ).reset_index()
+                    from analysis import knowledge_point_roster, knowledge_point_stats, roster_names
+                    from export import FORMATS, export_bytes, export_file_name
 
-                    # 确保'正确率'列是数值型
-                    attendance_by_dimension['正确率'] = (attendance_by_dimension['答对人次'] / attendance_by_dimension['总人次']) * 100
-                    attendance_by_dimension['正确率'] = pd.to_numeric(attendance_by_dimension['正确率'], errors='coerce')
-
-                    # 处理NaN和无效值，将它们设为0或者其他默认值
-                    attendance_by_dimension['正确率'] = attendance_by_dimension['正确率'].fillna(0)
+                    # 按选定维度过滤并统计，相同筛选条件和维度的结果在所有会话间共享
+                    df_filtered, attendance_by_dimension = knowledge_point_stats(
+                        selected_file_path, selected_dates, selected_courses, selected_sources, selected_dimension
+                    )
 
                     # 对数据按正确率降序或升序排列
                     sort_order = st.radio("选择排序方式", ('降序', '升序'), index=0)  # 默认降序
@@ -135,18 +108,14 @@ if os.path.exists(knowledge_point_folder):
                     # 构建每个维度的信息表格
                     table_data = []
 
+                    # 答错学生名单（去重）：按维度一次性汇总
+                    absent_names = roster_names(knowledge_point_roster(df_filtered, selected_dimension), selected_dimension) if show_absent_students else {}
+
                     for index, row in attendance_by_dimension_sorted.iterrows():
                         # 查找答错学生
                         absent_names_str = ""
                         if show_absent_students:
-                            absent_students = df_filtered[ 
-                                (df_filtered[selected_dimension] == row[selected_dimension]) & 
-                                (df_filtered['答题情况'] == '错误')
-                            ]
-
-                            absent_names = absent_students['姓名'].tolist()
-                            absent_names_set = set(absent_names)  # 去重
-                            absent_names_str = ", ".join(sorted(absent_names_set)) if absent_names_set else "所有学生都已经答对"
+                            absent_names_str = absent_names.get(row[selected_dimension], "所有学生都已经答对")
 
                         # 将每个维度的信息添加到表格数据
                         table_row = {selected_dimension: row[selected_dimension]}
@@ -163,6 +132,19 @@ if os.path.exists(knowledge_point_folder):
                     df_table = pd.DataFrame(table_data)
                     df_table['正确率'] = pd.to_numeric(df_table['正确率'], errors='coerce')
                     st.table(df_table.sort_values(by='正确率', ascending=ascending))
+
+                    # 导出所有维度的统计结果和答错学生
+                    with st.expander("导出"):
+                        export_format = st.selectbox("导出格式", list(FORMATS))
+                        if st.button("生成导出文件"):
+                            st.download_button(
+                                "下载导出文件",
+                                data=export_bytes('knowledge_points', selected_file_path, [selected_dates, selected_courses, selected_sources], available_dimensions, export_format),
+                                file_name=export_file_name('knowledge_points', selected_file_path, export_format),
+                                mime=FORMATS[export_format][1],
+                                # 点击下载不重新运行页面，下载按钮不会因“生成导出文件”按钮复位而消失
+                                on_click='ignore',
+                            )
         else:
             st.error(f"无法读取文件：{selected_file_path}")
 else:
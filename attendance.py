@@ -1,44 +1,27 @@
-import pandas as pd
 import streamlit as st
-import altair as alt
-import os
+
+from manifest import describe_file, load_manifest
 
 # 设置页面标题
 st.title("签到详情统计")
 
-# 自动读取当前目录下所有的xlsx文件
-file_list = [f for f in os.listdir() if f.endswith('.xlsx')]
-
-if file_list:
-    # 确保文件名为出勤.xlsx
-    selected_file = '出勤.xlsx'  # 假设文件名为出勤.xlsx
-    
-    # 读取数据
-    df = pd.read_excel(selected_file)
-
-    # 清理列名，去除可能的空格
-    df.columns = df.columns.str.strip()
+# 确保文件名为出勤.xlsx
+selected_file = '出勤.xlsx'  # 假设文件名为出勤.xlsx
 
-    # 处理缺失值：将空字符串替换为 NaN
-    df.replace('', pd.NA, inplace=True)
+# 从数据清单读取文件信息和筛选项；清单中已有记录时不打开工作簿
+file_list = load_manifest('.', selected_file)
 
-    # 用默认日期填充空值（2000年1月1日），可以防止 NaT 错误
-    df['时间'] = df['时间'].fillna(pd.to_datetime('2000-01-01'))
-
-    # 将签到状态“已签”和“教师代签”视为出勤，其他为缺勤
-    df['出勤状态'] = df['签到状态'].apply(lambda x: '出勤' if x in ['已签', '教师代签'] else '缺勤')
-
-    # 只考虑不是2000-01-01的时间
-    df_filtered = df[df['时间'] != pd.to_datetime('2000-01-01')]
+if file_list:
+    values = describe_file('.', selected_file, 'attendance')['values']
 
     # 获取所有可用的时间（日期）
-    available_dates = df_filtered['时间'].unique()
+    available_dates = values['时间']
     
     # 用户选择的日期
     selected_dates = st.multiselect("选择查看的日期", available_dates, default=available_dates)
 
     # 获取所有可用的课程
-    available_courses = df_filtered['课程'].unique()
+    available_courses = values['课程']
     
     # 用户选择的课程
     selected_courses = st.multiselect("选择查看的课程", available_courses, default=available_courses)
@@ -47,13 +30,6 @@ if file_list:
     show_absent_students = st.checkbox("显示缺勤学生", value=False)
 
     if selected_dates:
-        # 过滤选择的日期数据
-        df_filtered = df_filtered[df_filtered['时间'].isin(selected_dates)]
-
-        # 如果用户选择了课程，则过滤课程
-        if selected_courses:
-            df_filtered = df_filtered[df_filtered['课程'].isin(selected_courses)]
-
         # 获取所有可用的维度（列名），如果没有选择课程，就去除“课程”维度
         available_dimensions = [
             '学校', '院系', '专业', '行政班级', '授课班级', '教师'
@@ -66,27 +42,17 @@ if file_list:
         selected_dimension = st.selectbox("选择分析的维度", available_dimensions, index=1)  # 默认选择“院系”
 
         if selected_dimension:
-            # 动态分组，按用户选择的维度进行分组
-            groupby_columns = [selected_dimension]
-
-            # 按选定维度进行合并统计：计算总人次、出勤人次和缺勤人次
-            attendance_by_dimension = df_filtered.groupby(groupby_columns).agg(
-                总人次=('姓名', 'size'),
-                出勤人次=('出勤状态', lambda x: (x == '出勤').sum()),
-                缺勤人次=('出勤状态', lambda x: (x == '缺勤').sum())
-            ).reset_index()
-
-            # 计算出勤率
-            attendance_by_dimension['出勤率'] = (attendance_by_dimension['出勤人次'] / attendance_by_dimension['总人次']) * 100
-
-            # 处理计算结果中的NaN值
-            attendance_by_dimension['出勤率'] = attendance_by_dimension['出勤率'].fillna(0).round(2)
+            # 需要统计时才导入 pandas、altair 和统计模块，筛选框无需等待它们加载
+            import altair as alt
+            import pandas as pd
 
-            # 计算排序：100%出勤率排在最前面
-            attendance_by_dimension['排序出勤率'] = attendance_by_dimension['出勤率'].apply(lambda x: -1 if x == 100 else x)
+            from analysis import attendance_roster, attendance_stats, roster_names
+            from export import FORMATS, export_bytes, export_file_name
 
-            # 对数据按出勤率降序排列
-            attendance_by_dimension_sorted = attendance_by_dimension.sort_values(by=['排序出勤率', '出勤率'], ascending=[True, False])
+            # 按选定维度过滤并统计，相同筛选条件和维度的结果在所有会话间共享
+            df_filtered, attendance_by_dimension_sorted = attendance_stats(
+                selected_file, selected_dates, selected_courses, selected_dimension
+            )
 
             # 显示合并后的柱形图，按照出勤率降序排序
             st.subheader(f"按 {selected_dimension} 维度分析")
@@ -105,17 +71,14 @@ if file_list:
             # 构建每个维度的信息表格
             table_data = []
 
+            # 缺勤学生名单：按维度一次性汇总
+            absent_names = roster_names(attendance_roster(df_filtered, selected_dimension), selected_dimension) if show_absent_students else {}
+
             for index, row in attendance_by_dimension_sorted.iterrows():
                 # 查找缺勤学生
                 absent_names_str = ""
                 if show_absent_students:
-                    absent_students = df_filtered[ 
-                        (df_filtered[selected_dimension] == row[selected_dimension]) & 
-                        (df_filtered['出勤状态'] == '缺勤')
-                    ]
-
-                    absent_names = absent_students['姓名'].tolist()
-                    absent_names_str = ", ".join(absent_names) if absent_names else "没有缺勤学生"
+                    absent_names_str = absent_names.get(row[selected_dimension], "没有缺勤学生")
 
                 # 将每个维度的信息添加到表格数据
                 table_row = {selected_dimension: row[selected_dimension]}
@@ -131,5 +94,18 @@ if file_list:
             # 显示表格，按出勤率降序排列
             st.table(pd.DataFrame(table_data).sort_values(by='出勤率', ascending=False))
 
+            # 导出所有维度的统计结果和缺勤学生
+            with st.expander("导出"):
+                export_format = st.selectbox("导出格式", list(FORMATS))
+                if st.button("生成导出文件"):
+                    st.download_button(
+                        "下载导出文件",
+                        data=export_bytes('attendance', selected_file, [selected_dates, selected_courses], available_dimensions, export_format),
+                        file_name=export_file_name('attendance', selected_file, export_format),
+                        mime=FORMATS[export_format][1],
+                        # 点击下载不重新运行页面，下载按钮不会因“生成导出文件”按钮复位而消失
+                        on_click='ignore',
+                    )
+
 else:
-    st.error("当前目录下没有找到任何xlsx文件。")
+    st.error("当前目录下没有找到'出勤.xlsx'文件。")
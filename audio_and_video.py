@@ -1,8 +1,9 @@
-import pandas as pd
-import streamlit as st
-import altair as alt
 import os
 
+import streamlit as st
+
+from manifest import describe_file
+
 # 设置页面标题
 st.title("音视频观看详情")
 
@@ -11,23 +12,17 @@ selected_file = '音视频观看详情.xlsx'
 
 # 检查文件是否存在
 if os.path.exists(selected_file):
-    # 读取数据
-    df = pd.read_excel(selected_file)
-
-    # 清理列名，去除可能的空格
-    df.columns = df.columns.str.strip()
-
-    # 处理缺失值：将空字符串替换为 NaN
-    df.replace('', pd.NA, inplace=True)
+    # 筛选项来自数据清单，只在清单中没有记录时读取文件
+    values = describe_file('.', selected_file, 'audio_and_video')['values']
 
     # 获取所有可用的视频
-    available_dates = df['视频'].unique()
+    available_dates = values['视频']
     
     # 用户选择的视频
     selected_dates = st.multiselect("选择查看的视频", available_dates, default=available_dates)
 
     # 获取所有可用的课程
-    available_courses = df['课程'].unique()
+    available_courses = values['课程']
     
     # 用户选择的课程
     selected_courses = st.multiselect("选择查看的课程", available_courses, default=available_courses)
@@ -36,13 +31,6 @@ if os.path.exists(selected_file):
     show_unwatched_list = st.checkbox("显示未观看名单", value=False)
 
     if selected_dates:
-        # 过滤选择的视频数据
-        df_filtered = df[df['视频'].isin(selected_dates)]
-
-        # 如果用户选择了课程，则过滤课程
-        if selected_courses:
-            df_filtered = df_filtered[df_filtered['课程'].isin(selected_courses)]
-
         # 获取所有可用的维度（列名），如果没有选择课程，就去除“课程”维度
         available_dimensions = [
             '学校', '院系', '专业', '行政班级', '授课班级', '教师'
@@ -55,28 +43,17 @@ if os.path.exists(selected_file):
         selected_dimension = st.selectbox("选择分析的维度", available_dimensions, index=4)  # 默认选择“授课班级”
 
         if selected_dimension:
-            # 动态分组，按用户选择的维度进行分组
-            groupby_columns = [selected_dimension]
-
-            # 按选定维度进行合并统计：计算观看时长的总和、平均值、最大值和最小值
-            watch_time_stats_by_dimension = df_filtered.groupby(groupby_columns).agg(
-                总人次=('姓名', 'size'),
-                总观看时长=('观看时长', 'sum'),
-                最高观看时长=('观看时长', 'max'),
-                最低观看时长=('观看时长', 'min'),
-                已观看人次=('观看时长', lambda x: (x > 0).sum()),
-                未观看人次=('观看时长', lambda x: (x == 0).sum() or (x.isna()).sum())
-            ).reset_index()
-
-            # 确保观看时长是数值格式，并且去除无效值
-            watch_time_stats_by_dimension['平均观看时长'] = pd.to_numeric(watch_time_stats_by_dimension['总观看时长'], errors='coerce') / watch_time_stats_by_dimension['总人次']
-            watch_time_stats_by_dimension['最高观看时长'] = pd.to_numeric(watch_time_stats_by_dimension['最高观看时长'], errors='coerce')
-            watch_time_stats_by_dimension['最低观看时长'] = pd.to_numeric(watch_time_stats_by_dimension['最低观看时长'], errors='coerce')
-
-            # 处理NaN和无效值，将它们设为0或者其他默认值
-            watch_time_stats_by_dimension['平均观看时长'] = watch_time_stats_by_dimension['平均观看时长'].fillna(0)
-            watch_time_stats_by_dimension['最高观看时长'] = watch_time_stats_by_dimension['最高观看时长'].fillna(0)
-            watch_time_stats_by_dimension['最低观看时长'] = watch_time_stats_by_dimension['最低观看时长'].fillna(0)
+            # 需要统计时才导入 pandas、altair 和统计模块，筛选框无需等待它们加载
+            import altair as alt
+            import pandas as pd
+
+            from analysis import audio_and_video_roster, audio_and_video_stats, roster_names
+            from export import FORMATS, export_bytes, export_file_name
+
+            # 按选定维度过滤并统计，相同筛选条件和维度的结果在所有会话间共享
+            df_filtered, watch_time_stats_by_dimension = audio_and_video_stats(
+                selected_file, selected_dates, selected_courses, selected_dimension
+            )
 
             # 对数据按平均观看时长降序或升序排列
             sort_order = st.radio("选择排序方式", ('降序', '升序'), index=0)  # 默认降序
@@ -102,17 +79,14 @@ if os.path.exists(selected_file):
             # 构建每个维度的信息表格
             table_data = []
 
+            # 未观看名单：按维度一次性汇总
+            unwatched_names = roster_names(audio_and_video_roster(df_filtered, selected_dimension), selected_dimension) if show_unwatched_list else {}
+
             for index, row in watch_time_stats_by_dimension_sorted.iterrows():
                 # 查找未观看学生
                 unwatched_names_str = ""
                 if show_unwatched_list:
-                    unwatched_students = df_filtered[ 
-                        (df_filtered[selected_dimension] == row[selected_dimension]) & 
-                        ((df_filtered['观看时长'].isna()) | (df_filtered['观看时长'] == 0))
-                    ]
-
-                    unwatched_names = unwatched_students['姓名'].tolist()
-                    unwatched_names_str = ", ".join(unwatched_names) if unwatched_names else "没有未观看学生"
+                    unwatched_names_str = unwatched_names.get(row[selected_dimension], "没有未观看学生")
 
                 # 将每个维度的信息添加到表格数据
                 table_row = {selected_dimension: row[selected_dimension]}
@@ -133,5 +107,18 @@ if os.path.exists(selected_file):
             df_table['平均观看时长'] = pd.to_numeric(df_table['平均观看时长'], errors='coerce')
             st.table(df_table.sort_values(by='平均观看时长', ascending=ascending))
 
+            # 导出所有维度的统计结果和未观看名单
+            with st.expander("导出"):
+                export_format = st.selectbox("导出格式", list(FORMATS))
+                if st.button("生成导出文件"):
+                    st.download_button(
+                        "下载导出文件",
+                        data=export_bytes('audio_and_video', selected_file, [selected_dates, selected_courses], available_dimensions, export_format),
+                        file_name=export_file_name('audio_and_video', selected_file, export_format),
+                        mime=FORMATS[export_format][1],
+                        # 点击下载不重新运行页面，下载按钮不会因“生成导出文件”按钮复位而消失
+                        on_click='ignore',
+                    )
+
 else:
     st.error("当前目录下没有找到'音视频观看详情.xlsx'文件。")
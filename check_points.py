@@ -1,13 +1,13 @@
-import pandas as pd
 import streamlit as st
-import altair as alt
-import os
+
+from manifest import describe_file, load_manifest
 
 # 设置页面标题
 st.title("任务点完成详情")
 
-# 获取当前目录下所有以“任务点完成详情”开头的文件
-file_list = [f for f in os.listdir() if f.startswith('任务点完成详情') and f.endswith('.xlsx')]
+# 从数据清单获取当前目录下所有以“任务点完成详情”开头的文件
+files = load_manifest('.', '任务点完成详情')
+file_list = list(files)
 
 # 如果找不到符合条件的文件，提示用户
 if not file_list:
@@ -16,26 +16,17 @@ else:
     # 用户选择要分析的文件
     selected_file = st.selectbox("请选择要分析的文件", file_list)
 
-    # 读取选中的文件
-    df = pd.read_excel(selected_file)
-
-    # 清理列名，去除可能的空格
-    df.columns = df.columns.str.strip()
-
-    # 处理缺失值：将空字符串替换为 NaN
-    df.replace('', pd.NA, inplace=True)
-
-    # 将签到状态“已签”和“教师代签”视为出勤，其他为缺勤
-    df['完成情况'] = df['详情'].apply(lambda x: '已完成' if x in ['已完成'] else '未完成')
+    # 筛选项来自数据清单，只在清单中没有记录时读取所选文件
+    values = describe_file('.', selected_file, 'check_points')['values']
 
     # 获取所有可用的任务点
-    available_dates = df['任务点'].unique()
+    available_dates = values['任务点']
     
     # 用户选择的任务点
     selected_dates = st.multiselect("选择查看的任务点", available_dates, default=available_dates)
 
     # 获取所有可用的课程
-    available_courses = df['课程'].unique()
+    available_courses = values['课程']
     
     # 用户选择的课程
     selected_courses = st.multiselect("选择查看的课程", available_courses, default=available_courses)
@@ -44,13 +35,6 @@ else:
     show_absent_students = st.checkbox("显示未完成学生", value=False)
 
     if selected_dates:
-        # 过滤选择的任务点数据
-        df_filtered = df[df['任务点'].isin(selected_dates)]
-
-        # 如果用户选择了课程，则过滤课程
-        if selected_courses:
-            df_filtered = df_filtered[df_filtered['课程'].isin(selected_courses)]
-
         # 获取所有可用的维度（列名），如果没有选择课程，就去除“课程”维度
         available_dimensions = [
             '学校', '院系', '专业', '行政班级', '授课班级', '教师'
@@ -63,24 +47,17 @@ else:
         selected_dimension = st.selectbox("选择分析的维度", available_dimensions, index=1)  # 默认选择“院系”
 
         if selected_dimension:
-            # 动态分组，按用户选择的维度进行分组
-            groupby_columns = [selected_dimension]
+            # 需要统计时才导入 pandas、altair 和统计模块，筛选框无需等待它们加载
+            import altair as alt
+            import pandas as pd
 
-            # 按选定维度进行合并统计：计算总人次、出勤人次和缺勤人次
-            attendance_by_dimension = df_filtered.groupby(groupby_columns).agg(
-                总人次=('姓名', 'size'),
-                已完成人次=('完成情况', lambda x: (x == '已完成').sum()),
-                未完成人次=('完成情况', lambda x: (x == '未完成').sum())
-            ).reset_index()
+            from analysis import check_point_roster, check_point_stats, roster_names
+            from export import FORMATS, export_bytes, export_file_name
 
-            # 计算完成率，去掉百分号，只显示数字
-            attendance_by_dimension['完成率'] = (attendance_by_dimension['已完成人次'] / attendance_by_dimension['总人次']) * 100
-
-            # 确保完成率是数值格式，并且去除无效值
-            attendance_by_dimension['完成率'] = pd.to_numeric(attendance_by_dimension['完成率'], errors='coerce')
-
-            # 处理NaN和无效值，将它们设为0或者其他默认值
-            attendance_by_dimension['完成率'] = attendance_by_dimension['完成率'].fillna(0)
+            # 按选定维度过滤并统计，相同筛选条件和维度的结果在所有会话间共享
+            df_filtered, attendance_by_dimension = check_point_stats(
+                selected_file, selected_dates, selected_courses, selected_dimension
+            )
 
             # 对数据按完成率降序或升序排列
             sort_order = st.radio("选择排序方式", ('降序', '升序'), index=0)  # 默认降序
@@ -106,17 +83,14 @@ else:
             # 构建每个维度的信息表格
             table_data = []
 
+            # 未完成学生名单：按维度一次性汇总
+            absent_names = roster_names(check_point_roster(df_filtered, selected_dimension), selected_dimension) if show_absent_students else {}
+
             for index, row in attendance_by_dimension_sorted.iterrows():
                 # 查找未完成学生
                 absent_names_str = ""
                 if show_absent_students:
-                    absent_students = df_filtered[ 
-                        (df_filtered[selected_dimension] == row[selected_dimension]) & 
-                        (df_filtered['完成情况'] == '未完成')
-                    ]
-
-                    absent_names = absent_students['姓名'].tolist()
-                    absent_names_str = ", ".join(absent_names) if absent_names else "所有学生都已经完成任务"
+                    absent_names_str = absent_names.get(row[selected_dimension], "所有学生都已经完成任务")
 
                 # 将每个维度的信息添加到表格数据
                 table_row = {selected_dimension: row[selected_dimension]}
@@ -134,3 +108,16 @@ else:
             df_table = pd.DataFrame(table_data)
             df_table['完成率'] = pd.to_numeric(df_table['完成率'], errors='coerce')
             st.table(df_table.sort_values(by='完成率', ascending=ascending))
+
+            # 导出所有维度的统计结果和未完成学生
+            with st.expander("导出"):
+                export_format = st.selectbox("导出格式", list(FORMATS))
+                if st.button("生成导出文件"):
+                    st.download_button(
+                        "下载导出文件",
+                        data=export_bytes('check_points', selected_file, [selected_dates, selected_courses], available_dimensions, export_format),
+                        file_name=export_file_name('check_points', selected_file, export_format),
+                        mime=FORMATS[export_format][1],
+                        # 点击下载不重新运行页面，下载按钮不会因“生成导出文件”按钮复位而消失
+                        on_click='ignore',
+                    )
@@ -0,0 +1,159 @@
+"""导出：把各页面所有维度的统计结果和名单（缺勤/缺考/答错/未完成/未观看）
+直接从统计结果 DataFrame 写出为 xlsx、CSV 或 Parquet，分块流式写入，内存占用恒定。
+
+xlsx 为一个工作簿，每张表一个工作表（openpyxl write_only 模式）；
+CSV / Parquet 为 zip 压缩包，每张表一个文件。
+
+命令行用法：
+    python export.py attendance -o 出勤导出.xlsx
+    python export.py task --file 作业统计/Task 002.xlsx --format csv -o 作业导出.zip
+    python export.py knowledge_points --format parquet --dimensions 院系,教师 -o 知识点导出.zip
+"""
+import argparse
+import importlib.util
+import io
+import os
+import zipfile
+
+import analysis
+from shared_cache import shared_cache
+
+# 所有可分析的维度；页面在选择了课程时才提供“课程”维度
+DIMENSIONS = ['学校', '院系', '专业', '行政班级', '授课班级', '教师', '课程']
+
+# 导出格式 -> (文件扩展名, MIME 类型)；没有安装 pyarrow 时不提供 Parquet
+FORMATS = {
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('zip', 'application/zip'),
+}
+if importlib.util.find_spec('pyarrow') is not None:
+    FORMATS['parquet'] = ('zip', 'application/zip')
+
+# 每次写出的行数
+CHUNK_ROWS = 5000
+
+# 不导出的列：排序出勤率只用于页面排序；缺考名单已作为单独的名单表导出
+_EXCLUDED_COLUMNS = ['排序出勤率', '缺考名单']
+
+
+def export_tables(page, path, filters, dimensions, cache=shared_cache):
+    # 逐个维度生成 (表名, DataFrame)：先统计表，再名单表；按需计算，不一次性全部生成。
+    # 过滤后的数据只取一次（与页面共用同一份缓存），各维度直接分组统计，
+    # 不经过按维度的缓存，导出过程中不会为每个维度新增缓存条目
+    spec = analysis.PAGES[page]
+    df_filtered = spec['filtered'](path, *filters, cache=cache)
+    for dimension in dimensions:
+        stats = spec['aggregate'](df_filtered, dimension)
+        yield f"{dimension}统计", stats.drop(columns=_EXCLUDED_COLUMNS, errors='ignore')
+        yield f"{dimension}{spec['roster_title']}", spec['roster'](df_filtered, dimension)
+
+
+def _rows(df):
+    # 逐行产出，缺失值写为空单元格
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def write_xlsx(tables, dest):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for name, df in tables:
+        # 工作表名最长 31 个字符
+        ws = wb.create_sheet(title=name[:31])
+        ws.append([str(c) for c in df.columns])
+        for row in _rows(df):
+            ws.append(row)
+    wb.save(dest)
+
+
+def write_csv(tables, dest):
+    with zipfile.ZipFile(dest, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, df in tables:
+            with zf.open(f"{name}.csv", 'w') as raw:
+                # utf-8-sig：Excel 直接打开不乱码
+                with io.TextIOWrapper(raw, encoding='utf-8-sig', newline='') as f:
+                    df.to_csv(f, index=False, chunksize=CHUNK_ROWS)
+
+
+def write_parquet(tables, dest):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("导出 Parquet 需要安装 pyarrow：pip install pyarrow")
+
+    with zipfile.ZipFile(dest, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, df in tables:
+            # 文本列（可能混有数字）统一按字符串写出；逐块转换，不复制整张表
+            text_columns = {c: 'string' for c in df.columns if df[c].dtype == object}
+            with zf.open(f"{name}.parquet", 'w') as raw:
+                writer = None
+                try:
+                    for start in range(0, max(len(df), 1), CHUNK_ROWS):
+                        chunk = df.iloc[start:start + CHUNK_ROWS].astype(text_columns)
+                        if writer is None:
+                            # 表结构取自第一块
+                            schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                            writer = pq.ParquetWriter(raw, schema)
+                        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                finally:
+                    if writer is not None:
+                        writer.close()
+
+
+WRITERS = {
+    'xlsx': write_xlsx,
+    'csv': write_csv,
+    'parquet': write_parquet,
+}
+
+
+def export(page, path, filters, dimensions, fmt, dest, cache=shared_cache):
+    # dest 为文件路径或二进制文件对象
+    if fmt not in FORMATS:
+        raise ValueError(f"不支持的导出格式：{fmt}")
+    WRITERS[fmt](export_tables(page, path, filters, dimensions, cache), dest)
+
+
+def export_bytes(page, path, filters, dimensions, fmt, cache=shared_cache):
+    # 供页面下载按钮使用
+    buffer = io.BytesIO()
+    export(page, path, filters, dimensions, fmt, buffer, cache)
+    return buffer.getvalue()
+
+
+def export_file_name(page, path, fmt):
+    base = os.path.splitext(os.path.basename(path))[0]
+    return f"{base}_{page}_导出.{FORMATS[fmt][0]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="导出各页面所有维度的统计结果和名单")
+    parser.add_argument('page', choices=list(analysis.PAGES), help="要导出的页面")
+    parser.add_argument('--file', help="数据文件，默认与页面打开时的默认文件相同")
+    parser.add_argument('--format', choices=list(FORMATS), default='xlsx', help="导出格式")
+    parser.add_argument('--dimensions', default=','.join(DIMENSIONS), help="要导出的维度，逗号分隔")
+    parser.add_argument('-o', '--output', help="输出文件，默认为 <数据文件名>_<页面>_导出.<扩展名>")
+    args = parser.parse_args(argv)
+
+    path = args.file or analysis.PAGES[args.page]['data_file']()
+    if not path or not os.path.exists(path):
+        parser.error(f"没有找到数据文件：{path}")
+
+    dimensions = [d.strip() for d in args.dimensions.split(',') if d.strip()]
+    for dimension in dimensions:
+        if dimension not in DIMENSIONS:
+            parser.error(f"未知维度：{dimension}")
+
+    # 与页面默认一致：所有筛选条件全选
+    filters = analysis.default_filters(args.page, path)
+    output = args.output or export_file_name(args.page, path, args.format)
+    export(args.page, path, filters, dimensions, args.format, output)
+    print(f"已导出：{output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""并发用户压测：不启动浏览器，直接调用各页面的统计逻辑（analysis.py），
+模拟一个教学班同时打开同一页面，统计延迟 p50/p99 和吞吐量；
+--cold-start 在全新进程中测量页面冷启动时间（分别测量有清单和无清单两种情况）。
+
+用法：
+    python load_test.py                        # 1/10/50/100 个并发用户，共享缓存
+    python load_test.py --users 1,20 --cache none   # 不共享缓存（每个会话各自计算）
+    python load_test.py --pages attendance,task --rounds 3
+    python load_test.py --cold-start --cold-runs 5
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import analysis
+from manifest import MANIFEST_NAME, describe_file
+from shared_cache import NullCache, SharedCache, shared_cache
+
+# 模拟用户在不同维度之间切换，使部分请求相同、部分请求不同
+DIMENSIONS = ['院系', '授课班级', '教师']
+
+
+def percentile(values, p):
+    # 最近秩法（nearest-rank）百分位数
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = max(0, math.ceil(p / 100 * len(values)) - 1)
+    return values[k]
+
+
+def page_filters(page, path):
+    # 页面打开时的默认筛选条件（全选）。页面从数据清单取得筛选项，不计入请求耗时，
+    # 因此在计时之外取一次；使用单独的缓存，不预热被测缓存
+    return analysis.default_filters(page, path, NullCache())
+
+
+def simulate_page_open(page, path, filters, cache, dimension):
+    # 一次页面打开：读取数据一次 + 按筛选条件和所选维度统计，与页面所做的工作相同
+    return analysis.PAGES[page]['stats'](path, *filters, dimension, cache=cache)
+
+
+def run_level(page, path, filters, cache, users, rounds):
+    cache.clear()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(users)
+
+    def user(index):
+        # 所有用户同时开始，模拟整班同时打开页面
+        barrier.wait()
+        for r in range(rounds):
+            dimension = DIMENSIONS[(index + r) % len(DIMENSIONS)]
+            start = time.perf_counter()
+            try:
+                simulate_page_open(page, path, filters, cache, dimension)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    return {
+        '并发用户': users,
+        '请求数': len(latencies),
+        '失败': len(errors),
+        'p50(ms)': percentile(latencies, 50) * 1000,
+        'p99(ms)': percentile(latencies, 99) * 1000,
+        '吞吐量(req/s)': len(latencies) / wall if wall else 0.0,
+        **cache.stats(),
+    }
+
+
+# 冷启动：全新 Python 进程中，先测筛选项就绪（导入 streamlit + 读取数据清单 + 取得所打开文件的筛选项），
+# 再以无浏览器方式完整运行一次页面脚本
+_COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit
+from manifest import describe_file, load_manifest
+load_manifest(sys.argv[2], sys.argv[3])
+describe_file(sys.argv[2], sys.argv[4], sys.argv[5])
+filters_ready = time.perf_counter() - start
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600).run()
+first_run = time.perf_counter() - start
+print(json.dumps([filters_ready, first_run, len(at.exception)]))
+"""
+
+# 冷启动模式：有清单（所打开文件已记录在清单中）/ 无清单（首次部署，清单文件不存在）
+COLD_START_MODES = ['有清单', '无清单']
+
+
+def run_cold_start(page, path, runs, mode):
+    spec = analysis.PAGES[page]
+    script = os.path.abspath(spec['script'])
+    folder, prefix = spec['manifest']
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    backup_path = f"{manifest_path}.bak"
+
+    # 测量期间暂时移走已有的清单，结束后恢复
+    if os.path.exists(manifest_path):
+        os.replace(manifest_path, backup_path)
+    try:
+        filters_ready, first_run, errors = [], [], 0
+        for _ in range(runs):
+            if mode == '有清单':
+                if not os.path.exists(manifest_path):
+                    # 进程内已缓存的条目不会重写清单文件，先清空再记录
+                    shared_cache.clear()
+                    describe_file(folder, os.path.basename(path))
+            elif os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            result = subprocess.run(
+                [sys.executable, '-c', _COLD_START, script, folder, prefix, os.path.basename(path), page],
+                capture_output=True, text=True, check=True, cwd=os.getcwd(),
+            )
+            ready, total, exceptions = json.loads(result.stdout.strip().splitlines()[-1])
+            filters_ready.append(ready)
+            first_run.append(total)
+            errors += exceptions
+    finally:
+        if os.path.exists(backup_path):
+            os.replace(backup_path, manifest_path)
+        elif os.path.exists(manifest_path):
+            os.remove(manifest_path)
+    return {
+        '模式': mode,
+        '次数': runs,
+        '失败': errors,
+        '筛选项就绪p50(ms)': percentile(filters_ready, 50) * 1000,
+        '首次运行p50(ms)': percentile(first_run, 50) * 1000,
+        '首次运行最大(ms)': max(first_run) * 1000,
+    }
+
+
+def print_table(rows):
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    print("  ".join(f"{c:>12}" for c in columns))
+    for row in rows:
+        cells = []
+        for c in columns:
+            v = row.get(c, '')
+            cells.append(f"{v:>12.1f}" if isinstance(v, float) else f"{v!s:>12}")
+        print("  ".join(cells))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit 页面并发用户压测（无浏览器）")
+    parser.add_argument('--users', default='1,10,50,100', help="并发用户数列表，逗号分隔（1-100）")
+    parser.add_argument('--rounds', type=int, default=1, help="每个用户连续打开页面的次数")
+    parser.add_argument('--pages', default=','.join(analysis.PAGES), help="要压测的页面，逗号分隔")
+    parser.add_argument('--cache', choices=('shared', 'none'), default='shared',
+                        help="shared：会话间共享结果；none：每个会话各自计算")
+    parser.add_argument('--cold-start', action='store_true', help="测量页面冷启动时间（每次启动全新进程，有清单和无清单各测一遍）")
+    parser.add_argument('--cold-runs', type=int, default=3, help="冷启动测量次数")
+    args = parser.parse_args(argv)
+
+    levels = [int(u) for u in args.users.split(',') if u.strip()]
+    for users in levels:
+        if not 1 <= users <= 100:
+            parser.error("并发用户数必须在 1-100 之间")
+
+    cache = SharedCache() if args.cache == 'shared' else NullCache()
+
+    for page in args.pages.split(','):
+        if page not in analysis.PAGES:
+            parser.error(f"未知页面：{page}")
+        path = analysis.PAGES[page]['data_file']()
+        if not path or not os.path.exists(path):
+            print(f"[{page}] 跳过：没有找到数据文件")
+            continue
+
+        if args.cold_start:
+            print(f"[{page}] {path}  冷启动")
+            print_table([run_cold_start(page, path, args.cold_runs, mode) for mode in COLD_START_MODES])
+        else:
+            print(f"[{page}] {path}  缓存模式：{args.cache}")
+            filters = page_filters(page, path)
+            print_table([run_level(page, path, filters, cache, users, args.rounds) for users in levels])
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""数据清单：记录每个数据文件夹中 xlsx 文件的大小、修改时间、行数以及
+课程/作业/知识点等筛选列的取值，保存在文件夹下的 .manifest.json 中。
+
+页面启动时直接从清单填充筛选框，不需要导入 pandas、也不需要打开任何工作簿。
+清单按需补全：只有页面实际打开的文件在清单中没有记录或已修改时，才读取这一个文件；
+其余文件保持只有大小和修改时间，等被打开时再记录。
+"""
+import json
+import os
+import threading
+
+from shared_cache import shared_cache
+
+MANIFEST_NAME = '.manifest.json'
+
+# 记录取值的筛选列（各页面多选框用到的列）
+VALUE_COLUMNS = ['时间', '课程', '作业', '知识点', '来源', '任务点', '视频']
+
+# 出勤页面用这个日期填充空的时间并排除，它和空值都不作为时间筛选项
+PLACEHOLDER_DATE = '2000-01-01'
+
+# 同一进程内写清单文件时串行，避免并发更新互相覆盖
+_write_lock = threading.Lock()
+
+
+def _json_value(value):
+    # 转换为可写入 JSON 的值：缺失值（None/NaN/NaT/pd.NA）为 None，日期和其他非基本类型转为字符串
+    import pandas as pd
+
+    if pd.isna(value):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _scan(folder, prefix, suffix):
+    # 只读目录项，不打开文件
+    files = {}
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.startswith(prefix) and entry.name.endswith(suffix):
+                stat = entry.stat()
+                files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def _row_count(path):
+    # 工作表的实际数据行数（不含表头），与读取了哪些列无关；
+    # 优先使用工作表记录的尺寸，没有记录时才逐行计数
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True)
+    try:
+        ws = wb.worksheets[0]
+        rows = ws.max_row
+        if rows is None:
+            rows = sum(1 for _ in ws.iter_rows(values_only=True))
+        return max(rows - 1, 0)
+    finally:
+        wb.close()
+
+
+def _column_values(df):
+    # 筛选列取值，保持首次出现的顺序（与页面中 unique() 一致）；
+    # 缺失值（NaN/pd.NA/None 混在同一列时）只保留一个 None，时间列不保留缺失值和默认日期
+    import pandas as pd
+
+    placeholder = pd.Timestamp(PLACEHOLDER_DATE)
+    values = {}
+    for c in VALUE_COLUMNS:
+        if c not in df.columns:
+            continue
+        column_values = df[c].unique()
+        if c == '时间':
+            # 逐个转换：文本日期的格式可能不一致
+            column_values = [v for v in column_values
+                             if not pd.isna(v) and pd.to_datetime(v, errors='coerce') != placeholder]
+        values[c] = list(dict.fromkeys(_json_value(v) for v in column_values))
+    return values
+
+
+def _describe(path, df=None):
+    # df 为空时只读取筛选列
+    if df is None:
+        import pandas as pd
+
+        wanted = set(VALUE_COLUMNS)
+        df = pd.read_excel(path, usecols=lambda c: str(c).strip() in wanted)
+        df.columns = df.columns.str.strip()
+        df.replace('', pd.NA, inplace=True)
+    return {'rows': _row_count(path), 'values': _column_values(df)}
+
+
+def _read(manifest_path):
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write(manifest_path, manifest):
+    # 先写临时文件再替换，避免并发读取到写了一半的清单；目录只读时跳过
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, manifest_path)
+    except OSError:
+        pass
+
+
+def _is_fresh(entry, size, mtime_ns):
+    return bool(entry) and entry.get('size') == size and entry.get('mtime_ns') == mtime_ns and 'values' in entry
+
+
+def load_manifest(folder='.', prefix='', suffix='.xlsx'):
+    # 列出文件并读取清单，不打开任何工作簿；
+    # 清单中没有记录或已修改的文件只有大小和修改时间
+    if not os.path.isdir(folder):
+        return {}
+    stored = _read(os.path.join(folder, MANIFEST_NAME))
+    manifest = {}
+    for name, (size, mtime_ns) in _scan(folder, prefix, suffix).items():
+        entry = stored.get(name)
+        manifest[name] = entry if _is_fresh(entry, size, mtime_ns) else {'size': size, 'mtime_ns': mtime_ns}
+    return manifest
+
+
+def _update(folder, name, size, mtime_ns, page):
+    manifest_path = os.path.join(folder, MANIFEST_NAME)
+    entry = _read(manifest_path).get(name)
+    if _is_fresh(entry, size, mtime_ns):
+        return entry
+
+    path = os.path.join(folder, name)
+    df = None
+    if page is not None:
+        # 通过页面的读取函数读取：结果留在共享缓存中，随后的统计直接使用，工作簿只读取一次
+        import analysis
+
+        df = analysis.PAGES[page]['load'](path)
+    entry = {'size': size, 'mtime_ns': mtime_ns, **_describe(path, df)}
+
+    with _write_lock:
+        stored = _read(manifest_path)
+        stored[name] = entry
+        # 顺便清理已删除文件的条目
+        stored = {k: v for k, v in stored.items() if os.path.exists(os.path.join(folder, k))}
+        _write(manifest_path, stored)
+    return entry
+
+
+def describe_file(folder, name, page=None):
+    # 返回一个文件的清单条目（行数、筛选列取值）；清单中没有或已过期时只读取这一个文件。
+    # 进程内共享，并发请求同一文件时只读取一次
+    stat = os.stat(os.path.join(folder, name))
+    key = ('manifest', os.path.abspath(os.path.join(folder, name)), stat.st_size, stat.st_mtime_ns)
+    return shared_cache.get_or_compute(key, lambda: _update(folder, name, stat.st_size, stat.st_mtime_ns, page))
+
+
+def build_manifest(folder='.', prefix='', suffix='.xlsx'):
+    # 预先记录文件夹中的所有文件（部署后可先运行一次，页面首次打开时就不必读取）
+    return {name: describe_file(folder, name) for name in load_manifest(folder, prefix, suffix)}
+
+
+def newest_first(manifest):
+    # 按修改时间从新到旧排列文件名
+    return sorted(manifest, key=lambda name: manifest[name]['mtime_ns'], reverse=True)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="生成或更新数据文件夹的清单")
+    parser.add_argument('folders', nargs='*', default=['.', '作业统计', '知识点'], help="数据文件夹")
+    args = parser.parse_args(argv)
+
+    for folder in args.folders:
+        manifest = build_manifest(folder)
+        rows = sum(entry['rows'] for entry in manifest.values())
+        print(f"{folder}：{len(manifest)} 个文件，共 {rows} 行")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+
+def dataset_version(path):
+    # 数据集版本：文件路径 + 修改时间 + 文件大小，文件被替换后缓存自动失效
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def freeze(values):
+    # 将用户选择的筛选条件转换为可哈希、与选择顺序无关的缓存键；
+    # 带上类型名，1 与 '1'、None 与 'None' 等不同的选择不会得到相同的键
+    return tuple(sorted({(type(v).__name__, str(v)) for v in values}))
+
+
+class _Flight:
+    # 正在计算中的请求，其他相同请求等待它完成后直接复用结果
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def sizeof(value):
+    # 估算缓存结果占用的内存（字节）：DataFrame 按实际内存计算，元组逐项累加
+    if hasattr(value, 'memory_usage'):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class SharedCache:
+    # 进程内共享的计算缓存：所有会话共用同一份结果，
+    # 并发的相同请求只计算一次（single-flight）；
+    # 按条目数和占用内存两个上限淘汰最久未使用的结果
+    def __init__(self, max_entries=256, max_bytes=512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return self._results[key]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.misses += 1
+            else:
+                self.waits += 1
+
+        # 已有相同请求在计算，等待其结果
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            size = sizeof(flight.result)
+            with self._lock:
+                # 单个结果超过内存上限时不缓存，只返回给本次请求
+                if size <= self.max_bytes:
+                    self._results[key] = flight.result
+                    self._sizes[key] = size
+                    self._bytes += size
+                # 超出容量时淘汰最久未使用的结果
+                while len(self._results) > self.max_entries or self._bytes > self.max_bytes:
+                    old_key, _ = self._results.popitem(last=False)
+                    self._bytes -= self._sizes.pop(old_key)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+        return flight.result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.waits = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                '缓存条目': len(self._results),
+                '内存(MB)': self._bytes / 1024 / 1024,
+                '命中': self.hits,
+                '计算': self.misses,
+                '等待复用': self.waits,
+            }
+
+
+class NullCache:
+    # 不缓存，每次都重新计算（即各会话各自计算的原始行为），用于压测对比
+    def get_or_compute(self, key, compute):
+        return compute()
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+# 全局共享缓存：Streamlit 每次重新运行页面脚本，但导入的模块在进程内只加载一次
+shared_cache = SharedCache()
@@ -1,8 +1,9 @@
-import pandas as pd
-import streamlit as st
-import altair as alt
 import os
 
+import streamlit as st
+
+from manifest import describe_file, load_manifest
+
 # 设置页面标题
 st.title("2025专升本作业统计-英语")
 
@@ -11,8 +12,9 @@ assignments_folder = os.path.join(os.getcwd(), "作业统计")
 
 # 检查文件夹是否存在
 if os.path.exists(assignments_folder):
-    # 获取所有的xlsx文件，不包括扩展名
-    xlsx_files = [f.split('.')[0] for f in os.listdir(assignments_folder) if f.endswith('.xlsx')]
+    # 从数据清单获取所有的xlsx文件，不包括扩展名
+    files = load_manifest(assignments_folder)
+    xlsx_files = [f.split('.')[0] for f in files]
 
     # 如果没有xlsx文件
     if not xlsx_files:
@@ -25,34 +27,18 @@ if os.path.exists(assignments_folder):
             # 构建文件路径
             selected_file_path = os.path.join(assignments_folder, f"{selected_file[0]}.xlsx")
             
-            # 读取数据
-            df = pd.read_excel(selected_file_path)
-
-            # 清理列名，去除可能的空格
-            df.columns = df.columns.str.strip()
-
-            # 处理缺失值：将空字符串替换为 NaN
-            df.replace('', pd.NA, inplace=True)
-
-            # 如果成绩为空，视为缺考
-            df['成绩'] = df['成绩'].fillna('缺考')
+            # 筛选项来自数据清单，只在清单中没有记录时读取所选文件
+            values = describe_file(assignments_folder, os.path.basename(selected_file_path), 'task')['values']
 
             # 获取所有可用的作业
-            available_dates = df['作业'].unique()
+            available_dates = values['作业']
             selected_dates = st.multiselect("选择查看的作业", available_dates, default=available_dates)
 
             # 获取所有可用的课程
-            available_courses = df['课程'].unique()
+            available_courses = values['课程']
             selected_courses = st.multiselect("选择查看的课程", available_courses, default=available_courses)
 
             if selected_dates:
-                # 过滤选择的作业数据
-                df_filtered = df[df['作业'].isin(selected_dates)]
-
-                # 如果用户选择了课程，则过滤课程
-                if selected_courses:
-                    df_filtered = df_filtered[df_filtered['课程'].isin(selected_courses)]
-
                 # 获取所有可用的维度（列名）
                 available_dimensions = ['学校', '院系', '专业', '行政班级', '授课班级', '教师']
                 if selected_courses:
@@ -62,32 +48,20 @@ if os.path.exists(assignments_folder):
                 selected_dimension = st.selectbox("选择分析的维度", available_dimensions, index=1)  # 默认选择“院系”
 
                 if selected_dimension:
+                    # 需要统计时才导入 pandas、altair 和统计模块，筛选框无需等待它们加载
+                    import altair as alt
+                    import pandas as pd
+
+                    from analysis import task_stats
+                    from export import FORMATS, export_bytes, export_file_name
+
                     # 选择是否显示缺考名单（默认不显示）
                     show_absent_list = st.checkbox("显示缺考名单", value=False)
 
-                    # 按选定维度分组，计算各项统计数据
-                    stats_by_dimension = df_filtered.groupby([selected_dimension]).agg(
-                        总人次=('姓名', 'size'),
-                        平均成绩=('成绩', lambda x: pd.to_numeric(x[x != '缺考'], errors='coerce').mean()),  # 排除缺考
-                        及格人次=('成绩', lambda x: (pd.to_numeric(x[x != '缺考'], errors='coerce') >= 60).sum()),
-                        实考人次=('成绩', lambda x: (x != '缺考').sum()),
-                        缺考人次=('成绩', lambda x: (x == '缺考').sum()),
-                        缺考名单=('姓名', lambda x: ", ".join(x[df_filtered['成绩'] == '缺考'])),  # 计算缺考名单
-                        最高分=('成绩', lambda x: pd.to_numeric(x[x != '缺考'], errors='coerce').max()),
-                        最低分=('成绩', lambda x: pd.to_numeric(x[x != '缺考'], errors='coerce').min()),
-                        分数段0_59=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') < 60).sum())),
-                        分数段60_69=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') >= 60) & (pd.to_numeric(x[x != '缺考'], errors='coerce') < 70)).sum()),
-                        分数段70_79=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') >= 70) & (pd.to_numeric(x[x != '缺考'], errors='coerce') < 80)).sum()),
-                        分数段80_89=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') >= 80) & (pd.to_numeric(x[x != '缺考'], errors='coerce') < 90)).sum()),
-                        分数段90_99=('成绩', lambda x: ((pd.to_numeric(x[x != '缺考'], errors='coerce') >= 90) & (pd.to_numeric(x[x != '缺考'], errors='coerce') < 100)).sum()),
-                        分数段100=('成绩', lambda x: (pd.to_numeric(x[x != '缺考'], errors='coerce') == 100).sum())
-                    ).reset_index()
-
-                    # 处理NaN值
-                    stats_by_dimension.fillna(0, inplace=True)
-
-                    # 计算及格率
-                    stats_by_dimension['及格率'] = (stats_by_dimension['及格人次'] / stats_by_dimension['实考人次'] * 100).fillna(0).round(2)
+                    # 按选定维度过滤并统计，相同筛选条件和维度的结果在所有会话间共享
+                    _, stats_by_dimension = task_stats(
+                        selected_file_path, selected_dates, selected_courses, selected_dimension
+                    )
 
                     # 选择排序方式
                     ascending = st.radio("选择排序方式", ('降序', '升序'), index=0)
@@ -139,6 +113,19 @@ if os.path.exists(assignments_folder):
                     df_table = pd.DataFrame(table_data)
                     df_table['平均成绩'] = pd.to_numeric(df_table['平均成绩'], errors='coerce')
                     st.table(df_table.sort_values(by='平均成绩', ascending=(ascending == '升序')))
+
+                    # 导出所有维度的统计结果和缺考名单
+                    with st.expander("导出"):
+                        export_format = st.selectbox("导出格式", list(FORMATS))
+                        if st.button("生成导出文件"):
+                            st.download_button(
+                                "下载导出文件",
+                                data=export_bytes('task', selected_file_path, [selected_dates, selected_courses], available_dimensions, export_format),
+                                file_name=export_file_name('task', selected_file_path, export_format),
+                                mime=FORMATS[export_format][1],
+                                # 点击下载不重新运行页面，下载按钮不会因“生成导出文件”按钮复位而消失
+                                on_click='ignore',
+                            )
         else:
             st.error("请至少选择一个文件进行分析。")
 else:
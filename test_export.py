@@ -0,0 +1,143 @@
+import io
+import zipfile
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('openpyxl')
+
+import analysis
+import export
+
+ROSTER_TITLE = analysis.PAGES['attendance']['roster_title']
+
+
+def _attendance_frame():
+    # 与 load_attendance 读取后的结构相同；学号有缺失值，院系 B 没有缺勤（名单为空）
+    return pd.DataFrame({
+        '院系': ['A', 'A', 'A', 'A', 'A', 'B', 'B'],
+        '教师': ['t1', 't1', 't2', 't2', 't2', 't3', 't3'],
+        '姓名': ['甲', '乙', '丙', '丁', '戊', '己', '庚'],
+        '学号': ['001', None, '003', None, '005', '006', '007'],
+        '出勤状态': ['出勤', '缺勤', '缺勤', '缺勤', '出勤', '出勤', '出勤'],
+    })
+
+
+def _tables():
+    df = _attendance_frame()
+    tables = []
+    for dimension in ('院系', '教师'):
+        stats = analysis.attendance_aggregate(df, dimension)
+        tables.append((f"{dimension}统计", stats.drop(columns=export._EXCLUDED_COLUMNS, errors='ignore')))
+        tables.append((f"{dimension}{ROSTER_TITLE}", analysis.attendance_roster(df, dimension)))
+    only_b = df[df['院系'] == 'B']
+    tables.append(("空名单", analysis.attendance_roster(only_b, '院系')))
+    return tables
+
+
+def _rows(df, as_text=False):
+    # 比较用：缺失值为 None，数值统一为 float（CSV 读回时统一为字符串）
+    rows = []
+    for row in df.astype(object).itertuples(index=False, name=None):
+        cells = []
+        for v in row:
+            if pd.isna(v):
+                cells.append(None)
+            elif as_text:
+                cells.append(str(v))
+            elif isinstance(v, (int, float)) and not isinstance(v, bool):
+                cells.append(float(v))
+            else:
+                cells.append(v)
+        rows.append(cells)
+    return rows
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # 小分块，确保多块写出的路径被覆盖
+    monkeypatch.setattr(export, 'CHUNK_ROWS', 2)
+
+
+def test_tables_have_missing_values_and_an_empty_roster():
+    tables = dict(_tables())
+    assert tables[f'院系{ROSTER_TITLE}']['学号'].isna().any()
+    assert tables['空名单'].empty
+
+
+def test_write_xlsx_one_sheet_per_table():
+    tables = _tables()
+    buffer = io.BytesIO()
+    export.write_xlsx(iter(tables), buffer)
+
+    sheets = pd.read_excel(io.BytesIO(buffer.getvalue()), sheet_name=None, dtype={'学号': str})
+    assert list(sheets) == [name for name, _ in tables]
+    for name, df in tables:
+        assert list(sheets[name].columns) == list(df.columns)
+        assert _rows(sheets[name]) == _rows(df)
+
+
+def test_write_csv_one_file_per_table():
+    tables = _tables()
+    buffer = io.BytesIO()
+    export.write_csv(iter(tables), buffer)
+
+    with zipfile.ZipFile(buffer) as zf:
+        assert zf.namelist() == [f"{name}.csv" for name, _ in tables]
+        for name, df in tables:
+            read = pd.read_csv(zf.open(f"{name}.csv"), encoding='utf-8-sig', dtype=str)
+            assert list(read.columns) == list(df.columns)
+            assert _rows(read, as_text=True) == _rows(df, as_text=True)
+
+
+def test_write_parquet_one_file_per_table():
+    pytest.importorskip('pyarrow')
+    tables = _tables()
+    buffer = io.BytesIO()
+    export.write_parquet(iter(tables), buffer)
+
+    with zipfile.ZipFile(buffer) as zf:
+        assert zf.namelist() == [f"{name}.parquet" for name, _ in tables]
+        for name, df in tables:
+            read = pd.read_parquet(io.BytesIO(zf.read(f"{name}.parquet")))
+            assert list(read.columns) == list(df.columns)
+            assert _rows(read) == _rows(df)
+
+
+def test_write_parquet_mixed_text_column_across_chunks():
+    pytest.importorskip('pyarrow')
+    # 第一块全是数字、后面的块有文本：按字符串写出，表结构取自第一块也能写入后面的块
+    df = pd.DataFrame({'成绩': pd.Series([90, 85, '缺考', None, 60], dtype=object), '序号': range(5)})
+    buffer = io.BytesIO()
+    export.write_parquet(iter([("成绩", df)]), buffer)
+
+    with zipfile.ZipFile(buffer) as zf:
+        read = pd.read_parquet(io.BytesIO(zf.read("成绩.parquet")))
+    assert _rows(read) == [['90', 0.0], ['85', 1.0], ['缺考', 2.0], [None, 3.0], ['60', 4.0]]
+
+
+def _attendance_file(tmp_path):
+    # 写出一个与出勤.xlsx 结构相同的小文件
+    path = str(tmp_path / '出勤.xlsx')
+    df = _attendance_frame()
+    df['时间'] = pd.Timestamp('2024-03-01')
+    df['课程'] = '语文'
+    df['签到状态'] = df['出勤状态'].map({'出勤': '已签', '缺勤': '未签'})
+    df.drop(columns='出勤状态').to_excel(path, index=False)
+    return path
+
+
+def test_export_tables_one_stats_and_roster_per_dimension(tmp_path):
+    path = _attendance_file(tmp_path)
+    filters = analysis.default_filters('attendance', path)
+    names = [name for name, _ in export.export_tables('attendance', path, filters, ['院系', '教师'])]
+    assert names == ['院系统计', f'院系{ROSTER_TITLE}', '教师统计', f'教师{ROSTER_TITLE}']
+
+
+def test_main_accepts_spaces_between_dimensions(tmp_path):
+    path = _attendance_file(tmp_path)
+    output = str(tmp_path / '导出.xlsx')
+    export.main(['attendance', '--file', path, '--dimensions', '院系, 教师', '-o', output])
+
+    sheets = pd.read_excel(output, sheet_name=None)
+    assert list(sheets) == ['院系统计', f'院系{ROSTER_TITLE}', '教师统计', f'教师{ROSTER_TITLE}']
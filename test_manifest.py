@@ -0,0 +1,98 @@
+import json
+import os
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+np = pytest.importorskip('numpy')
+pytest.importorskip('openpyxl')
+
+from analysis import _isin
+from manifest import MANIFEST_NAME, _column_values, _is_fresh, _json_value, describe_file, load_manifest
+
+
+def _round_trip(values):
+    # 与写入、读取清单文件时相同的转换
+    return json.loads(json.dumps(values, ensure_ascii=False))
+
+
+def test_json_value_missing_values_become_none():
+    for value in (None, np.nan, pd.NA, pd.NaT):
+        assert _json_value(value) is None
+
+
+def test_json_value_converts_scalars():
+    assert _json_value(np.int64(3)) == 3
+    assert _json_value('课程') == '课程'
+    assert _json_value(pd.Timestamp('2024-03-01 08:30')) == '2024-03-01 08:30:00'
+
+
+def test_column_values_keep_one_none_and_drop_placeholder_dates():
+    df = pd.DataFrame({
+        '课程': pd.Series(['语文', pd.NA, np.nan, '数学', None], dtype=object),
+        '时间': pd.to_datetime(['2024-03-01', None, '2000-01-01', '2024-03-02 08:30:00', '2024-03-01'], format='ISO8601'),
+    })
+    values = _round_trip(_column_values(df))
+
+    assert values['课程'] == ['语文', None, '数学']
+    assert values['时间'] == ['2024-03-01 00:00:00', '2024-03-02 08:30:00']
+
+
+def test_column_values_drop_placeholder_in_text_dates():
+    df = pd.DataFrame({'时间': ['2024-03-01', '2000-01-01 00:00:00', None]})
+    assert _column_values(df)['时间'] == ['2024-03-01']
+
+
+def test_isin_selected_none_matches_missing_values():
+    column = pd.Series(['语文', None, np.nan, pd.NA, '数学'], dtype=object)
+    values = _round_trip(_column_values(pd.DataFrame({'课程': column}))['课程'])
+
+    assert _isin(column, values).all()
+    assert _isin(column, ['语文', None]).tolist() == [True, True, True, True, False]
+    assert _isin(column, ['语文']).tolist() == [True, False, False, False, False]
+
+
+def test_isin_datetime_column_matches_manifest_strings():
+    column = pd.Series(pd.to_datetime(['2024-03-01', '2024-03-02 08:30:00', None], format='ISO8601'))
+    values = _round_trip(_column_values(pd.DataFrame({'时间': column}))['时间'])
+
+    assert _isin(column, values).tolist() == [True, True, False]
+    assert _isin(column, ['2024-03-02 08:30:00']).tolist() == [False, True, False]
+    assert _isin(column, ['2024-03-01', None]).tolist() == [True, False, True]
+
+
+def test_is_fresh_checks_size_mtime_and_values():
+    entry = {'size': 10, 'mtime_ns': 5, 'rows': 1, 'values': {}}
+    assert _is_fresh(entry, 10, 5)
+    assert not _is_fresh(entry, 11, 5)
+    assert not _is_fresh(entry, 10, 6)
+    assert not _is_fresh({'size': 10, 'mtime_ns': 5}, 10, 5)
+    assert not _is_fresh(None, 10, 5)
+
+
+def test_load_manifest_invalidates_changed_files(tmp_path):
+    folder = str(tmp_path)
+    path = os.path.join(folder, 'Task 001.xlsx')
+    pd.DataFrame({'作业': ['作业1', '作业2'], '课程': ['语文', None], '成绩': [90, 80]}).to_excel(path, index=False)
+
+    entry = describe_file(folder, 'Task 001.xlsx')
+    assert entry['rows'] == 2
+    assert entry['values'] == {'课程': ['语文', None], '作业': ['作业1', '作业2']}
+    assert os.path.exists(os.path.join(folder, MANIFEST_NAME))
+    assert load_manifest(folder)['Task 001.xlsx']['values'] == entry['values']
+
+    # 修改时间变化：清单条目过期，只剩大小和修改时间
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert 'values' not in load_manifest(folder)['Task 001.xlsx']
+
+    # 重新记录后内容（大小）变化：同样过期，再次记录得到新的取值
+    describe_file(folder, 'Task 001.xlsx')
+    assert 'values' in load_manifest(folder)['Task 001.xlsx']
+    pd.DataFrame({'作业': ['作业3'] * 50, '课程': ['数学'] * 50}).to_excel(path, index=False)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert 'values' not in load_manifest(folder)['Task 001.xlsx']
+
+    entry = describe_file(folder, 'Task 001.xlsx')
+    assert entry['rows'] == 50
+    assert entry['values'] == {'课程': ['数学'], '作业': ['作业3']}
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from shared_cache import SharedCache, freeze
+
+USERS = 20
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        time.sleep(0.001)
+
+
+def _run_concurrently(cache, compute):
+    # USERS 个线程同时请求同一个键，返回每个线程得到的结果或异常
+    outcomes = [None] * USERS
+
+    def user(index):
+        try:
+            outcomes[index] = cache.get_or_compute('key', compute)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(USERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    return outcomes
+
+
+def test_concurrent_callers_compute_once():
+    cache = SharedCache()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        # 等其他请求都进入等待后再返回，确保它们确实是并发的
+        release.wait(timeout=5)
+        return object()
+
+    waiter = threading.Thread(target=lambda: (_wait_until(lambda: cache.waits == USERS - 1), release.set()))
+    waiter.start()
+    outcomes = _run_concurrently(cache, compute)
+    waiter.join()
+
+    assert len(calls) == 1
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    assert cache.stats()['计算'] == 1
+    assert cache.stats()['等待复用'] == USERS - 1
+
+
+def test_concurrent_callers_get_leader_exception():
+    cache = SharedCache()
+    calls = []
+    release = threading.Event()
+    error = ValueError("读取失败")
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=5)
+        raise error
+
+    waiter = threading.Thread(target=lambda: (_wait_until(lambda: cache.waits == USERS - 1), release.set()))
+    waiter.start()
+    outcomes = _run_concurrently(cache, compute)
+    waiter.join()
+
+    assert len(calls) == 1
+    assert all(outcome is error for outcome in outcomes)
+
+    # 失败的结果不缓存，下次请求重新计算
+    assert cache.get_or_compute('key', lambda: 1) == 1
+
+
+def test_evicts_least_recently_used_entry():
+    cache = SharedCache(max_entries=2)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('b', lambda: 2)
+    cache.get_or_compute('a', lambda: pytest.fail("a 不应被淘汰"))
+    cache.get_or_compute('c', lambda: 3)
+
+    assert cache.get_or_compute('b', lambda: 'recomputed') == 'recomputed'
+    assert cache.get_or_compute('c', lambda: pytest.fail("c 不应被淘汰")) == 3
+
+
+def test_evicts_by_memory():
+    pd = pytest.importorskip('pandas')
+    frame = pd.DataFrame({'x': range(1000)})
+    size = int(frame.memory_usage(index=True, deep=True).sum())
+    cache = SharedCache(max_bytes=size * 2)
+
+    cache.get_or_compute('a', lambda: frame)
+    cache.get_or_compute('b', lambda: frame.copy())
+    cache.get_or_compute('c', lambda: frame.copy())
+
+    assert cache.stats()['缓存条目'] == 2
+    assert cache.get_or_compute('a', lambda: 'recomputed') == 'recomputed'
+
+
+def test_freeze_ignores_order_and_duplicates():
+    assert freeze(['b', 'a', 'a']) == freeze(['a', 'b'])
+
+
+def test_freeze_distinguishes_types():
+    assert freeze([1]) != freeze(['1'])
+    assert freeze([None]) != freeze(['None'])
+    assert freeze([1, 'a']) != freeze(['1', 'a'])